@@ -17,6 +17,7 @@ from common import http_handler
 from common import soup_handler
 from youtube.search_results_json_parser import SearchResultsJSONParser
 from youtube.video_data_manager import VideoDataManager
+from youtube.view_count_series import ViewCountSeries
 
 
 def get_results_json(soup):
@@ -174,58 +175,61 @@ def get_json_for_search(query,
 
 
 if __name__ == "__main__":
-    video_data_manager = VideoDataManager()
-
-    search_query = "python"
-    # results_json = get_json_for_search(search_query, use_mobile=False)
-    mobile_results_json = get_json_for_search(search_query)
-
-    # results_parser = SearchResultsJSONParser(mobile_results_json)
-    results_parser = SearchResultsJSONParser()
-    results_parser.parse_video_results(mobile_results_json)
-    # Debug - write JSON response to file
-    results_parser.write_results_json_to_file()
-    # TODO testing multiple calls to make sure there's no duplicates,
-    # but in real usage only need to call at the end.
-    video_data_manager.add_videos(results_parser.get_video_results())
-
-    estimated_results = results_parser.get_estimated_results_count()
-    print(f"Search found {estimated_results} results.")
-    if estimated_results == 0:
-        print(f"No results found for: {search_query}")
-        sys.exit(0)
-
-    # "Round 2" of results. Mostly for testing. Proper infinite scrolling
-    # handling needs to take place, wherein user can specify how many
-    # results they want to store. We also probably need some sort of
-    # flood control mechanism.
-    if estimated_results > 0:
-        # In the future we should also check if estimated_results > desired_results
-        ctoken, ctp = results_parser.get_next_continuation_data()
-        if not ctoken is None or not ctp is None:
-            # we probably want to log these at debug level
-            # print(f"Continuation Token: {token}")
-            # print(f"CTP: {ctp}")
-            # results_parser.parse_video_results(get_json_for_search(search_query, ctoken, ctp))
-            results_parser.parse_video_results(get_json_for_search(search_query, ctoken, ctp))
-            # Debug - write JSON response to file
-            results_parser.write_results_json_to_file(filename="continuations_json.json")
-
-            # TODO see above usage, this can be called at the end. This is just here for testing.
-            video_data_manager.add_videos(results_parser.get_video_results())
-
-    # Parse video data from results and output them
-    video_data_manager.print_videos()
-    video_data_manager.write_videos_to_markdown_file()
-
-    #
-    # TODO Infinite scroll handling
-    # estimated_results = results_parser.get_estimated_results_count()
-    # while estimated_results < videos we have:
-    #   ctoken, ctp = results_parser.get_next_continuation_data()
-    #
-    #   results_parser.update_results_json(get_json_for_search(search_query, ctoken, ctp))
-    #   need to check if json contains anything that tells us there's
-    #       no more results
-    #   parse all results at once, or let user specify limit of how many
-    #       results we get
\ No newline at end of file
+    # View counts are appended to files on disk on every run, so repeated
+    # crawls build up a time series of how each video performs. The with
+    # block flushes them even if the run exits early (sys.exit()).
+    with ViewCountSeries("yt_view_counts") as view_count_series:
+        video_data_manager = VideoDataManager(view_count_series)
+
+        search_query = "python"
+        # results_json = get_json_for_search(search_query, use_mobile=False)
+        mobile_results_json = get_json_for_search(search_query)
+
+        # results_parser = SearchResultsJSONParser(mobile_results_json)
+        results_parser = SearchResultsJSONParser()
+        results_parser.parse_video_results(mobile_results_json)
+        # Debug - write JSON response to file
+        results_parser.write_results_json_to_file()
+
+        estimated_results = results_parser.get_estimated_results_count()
+        print(f"Search found {estimated_results} results.")
+        if estimated_results == 0:
+            print(f"No results found for: {search_query}")
+            sys.exit(0)
+
+        # "Round 2" of results. Mostly for testing. Proper infinite scrolling
+        # handling needs to take place, wherein user can specify how many
+        # results they want to store. We also probably need some sort of
+        # flood control mechanism.
+        if estimated_results > 0:
+            # In the future we should also check if estimated_results > desired_results
+            ctoken, ctp = results_parser.get_next_continuation_data()
+            if not ctoken is None or not ctp is None:
+                # we probably want to log these at debug level
+                # print(f"Continuation Token: {token}")
+                # print(f"CTP: {ctp}")
+                # results_parser.parse_video_results(get_json_for_search(search_query, ctoken, ctp))
+                results_parser.parse_video_results(get_json_for_search(search_query, ctoken, ctp))
+                # Debug - write JSON response to file
+                results_parser.write_results_json_to_file(filename="continuations_json.json")
+
+        # The parser accumulates the videos of every page, so they are added
+        # once at the end. Adding them after each page would record the view
+        # counts of the first page's videos more than once per crawl.
+        video_data_manager.add_videos(results_parser.get_video_results())
+
+        # Parse video data from results and output them
+        video_data_manager.print_videos()
+        video_data_manager.write_videos_to_markdown_file()
+
+        #
+        # TODO Infinite scroll handling
+        # estimated_results = results_parser.get_estimated_results_count()
+        # while estimated_results < videos we have:
+        #   ctoken, ctp = results_parser.get_next_continuation_data()
+        #
+        #   results_parser.update_results_json(get_json_for_search(search_query, ctoken, ctp))
+        #   need to check if json contains anything that tells us there's
+        #       no more results
+        #   parse all results at once, or let user specify limit of how many
+        #       results we get
\ No newline at end of file
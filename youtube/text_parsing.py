@@ -0,0 +1,85 @@
+"""Provides functions to parse the human-readable text found in YouTube
+search results (view counts, video lengths) into numbers.
+"""
+
+
+__author__ = "Phixyn"
+
+
+import re
+
+
+_VIEW_COUNT_MULTIPLIERS = {
+    None: 1,
+    "K": 1_000,
+    "M": 1_000_000,
+    "B": 1_000_000_000,
+}
+
+_VIEW_COUNT_REGEX = re.compile(r"([\d.,]+)\s*([KMB])?\b", re.IGNORECASE)
+
+
+def parse_view_count(view_count_text):
+    """Parses a view count string into an integer.
+
+    Usage examples:
+        parse_view_count("1,234,567 views") -> 1234567
+        parse_view_count("1.2M views") -> 1200000
+        parse_view_count("No views") -> 0
+        parse_view_count("2 watching") -> None
+
+    Args:
+        view_count_text: A string with the number of views for a video, as
+            found in the 'viewCountText' of the search results JSON.
+
+    Returns:
+        The number of views as an integer, or None if the string could not
+            be parsed. Also None for live streams' concurrent viewer counts
+            (e.g. "2 watching"), which are not view counts.
+    """
+    if not view_count_text:
+        return None
+    if "watching" in view_count_text.lower():
+        return None
+    if view_count_text.strip().lower().startswith("no views"):
+        return 0
+
+    match = _VIEW_COUNT_REGEX.search(view_count_text)
+    if match is None:
+        return None
+
+    number, suffix = match.groups()
+    multiplier = _VIEW_COUNT_MULTIPLIERS[suffix and suffix.upper()]
+    try:
+        if multiplier == 1:
+            return int(number.replace(",", "").replace(".", ""))
+        return int(float(number.replace(",", "")) * multiplier)
+    except ValueError:
+        return None
+
+
+def parse_length(length_text):
+    """Parses a video length string into a number of seconds.
+
+    Usage examples:
+        parse_length("4:13") -> 253
+        parse_length("1:02:03") -> 3723
+
+    Args:
+        length_text: A string with the length of a video, as found in the
+            'lengthText' of the search results JSON.
+
+    Returns:
+        The length of the video in seconds, or None if the string could not
+            be parsed.
+    """
+    if not length_text:
+        return None
+
+    seconds = 0
+    try:
+        for part in length_text.strip().split(":"):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
+        return None
+    return seconds
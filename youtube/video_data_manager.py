@@ -5,6 +5,7 @@ __author__ = "Phixyn"
 
 
 from youtube.data_classes.video import Video
+from youtube.video_index import VideoIndex
 
 
 class VideoDataManager:
@@ -13,10 +14,22 @@ class VideoDataManager:
 
     Attributes:
         _videos: A dictionary of 'video_id: Video' entries.
+        _index: A VideoIndex over the videos in the dict, updated as videos
+            are added.
+        _view_count_series: An optional ViewCountSeries in which a view count
+            sample is recorded for every video added, including videos that
+            are already present in the dict.
     """
-    def __init__(self):
-        """Initializes an empty dictionary to store Video objects."""
+    def __init__(self, view_count_series=None):
+        """Initializes an empty dictionary to store Video objects.
+
+        Args:
+            view_count_series: An optional ViewCountSeries used to track view
+                counts of videos across repeated crawls.
+        """
         self._videos = {}
+        self._index = VideoIndex()
+        self._view_count_series = view_count_series
 
     def add_video(
         self,
@@ -31,7 +44,8 @@ class VideoDataManager:
         view_count_text
     ):
         """Constructs a new Video object and adds it to the videos dict. If the video
-        is already present in the dict, it is not added again.
+        is already present in the dict, it is not added again, but its view count is
+        updated and recorded in the view count series (if any).
 
         Args:
             video_id: A unique string ID for the video.
@@ -44,10 +58,8 @@ class VideoDataManager:
             uploaded_on: A string specifying when the video was uploaded.
             view_count_text: A string with the number of views for the video.
         """
-        if video_id in self._videos:
-            print(f"Video '{video_id}' already in dict, not adding.")
-        else:
-            self._videos[video_id] = Video(
+        self.add_video_data_object(
+            Video(
                 video_id,
                 f"https://www.youtube.com/watch?v={video_id}",
                 thumbnail_url,
@@ -59,10 +71,13 @@ class VideoDataManager:
                 uploaded_on,
                 view_count_text
             )
+        )
 
     def add_video_data_object(self, video):
         """Adds a new Video object to the videos dict, if it is not already present
-        in the dict.
+        in the dict. If it is, only the view count of the Video object in the dict
+        is updated. Either way, the video's view count is recorded in the view
+        count series (if any).
 
         Args:
             video: An instance of the Video dataclass, to be added to the dict of
@@ -70,9 +85,22 @@ class VideoDataManager:
         """
         video_id = video.video_id
         if video_id in self._videos:
-            print(f"Video '{video_id}' already in dict, not adding.")
+            print(f"Video '{video_id}' already in dict, updating view count.")
+            self._videos[video_id].view_count_text = video.view_count_text
         else:
             self._videos[video_id] = video
+        self._index.add(video)
+        self._record_view_count(video)
+
+    def _record_view_count(self, video):
+        """Records a view count sample for the given Video object in the view
+        count series, if one was given to this manager.
+
+        Args:
+            video: An instance of the Video dataclass.
+        """
+        if self._view_count_series is not None:
+            self._view_count_series.add_video_sample(video)
 
     def add_videos(self, videos):
         """Adds the given Video objects to the videos dict.
@@ -114,6 +142,64 @@ class VideoDataManager:
         """
         return self._videos.values()
 
+    def find_videos(
+        self,
+        title=None,
+        channel=None,
+        min_length=None,
+        max_length=None,
+        min_views=None,
+        max_views=None
+    ):
+        """Finds the videos in the dict matching every given criterion, using the
+        video index instead of scanning every video. Criteria left as None are
+        ignored. View count criteria use the view count from the latest crawl.
+
+        Args:
+            title: A string of keywords which must all appear in the title
+                (case-insensitive).
+            channel: Name of the channel that uploaded the video
+                (case-insensitive).
+            min_length: Minimum length of the video, in seconds.
+            max_length: Maximum length of the video, in seconds.
+            min_views: Minimum number of views.
+            max_views: Maximum number of views.
+
+        Returns:
+            A list of matching Video data objects.
+
+        See also:
+            VideoIndex.query()
+        """
+        video_ids = self._index.query(
+            title=title,
+            channel=channel,
+            min_length=min_length,
+            max_length=max_length,
+            min_views=min_views,
+            max_views=max_views
+        )
+        return [self._videos[video_id] for video_id in video_ids]
+
+    def find_near_duplicates(self, video_id, min_similarity=0.8, length_tolerance=5):
+        """Finds videos in the dict that are likely re-uploads of the video with
+        the given ID (near-identical title and about the same length).
+
+        Args:
+            video_id: The ID of a video in the dict. For example, "dQw4w9WgXcQ".
+            min_similarity: Minimum Jaccard similarity (0.0 to 1.0) between
+                the title words of both videos.
+            length_tolerance: Maximum difference in length, in seconds.
+
+        Returns:
+            A list of Video data objects, most similar first.
+
+        See also:
+            VideoIndex.find_near_duplicates()
+        """
+        duplicates = self._index.find_near_duplicates(video_id, min_similarity, length_tolerance)
+        return [self._videos[duplicate_id] for duplicate_id, _ in duplicates]
+
     def print_videos(self):
         """Outputs a friendly string representation for each Video object in the
         dict to STDOUT.
@@ -0,0 +1,356 @@
+"""Provides the VideoIndex class."""
+
+
+__author__ = "Phixyn"
+
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from youtube.text_parsing import parse_length, parse_view_count
+
+
+_TOKEN_REGEX = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Splits a string into a set of lowercase word tokens.
+
+    Args:
+        text: The string to tokenize, such as a video title.
+
+    Returns:
+        A set of lowercase token strings.
+    """
+    return set(_TOKEN_REGEX.findall(text.lower())) if text else set()
+
+
+class _RangeIndex:
+    """Index of a numeric value per video, used to find the videos whose value
+    lies within a range using bisection.
+
+    Entries are stored as two aligned typed arrays sorted by (value, video
+    number), rather than as Python objects. Changes are appended to a buffer
+    and only applied when a range is next requested, so adding a video
+    costs O(1) instead of an O(n) sorted insert. A small buffer (such as a
+    few re-crawled view counts) is applied in place by bisection, while a
+    large one (such as a fresh batch of videos) is merged linearly.
+
+    Attributes:
+        _values: An array of values, indexed by video number. -1 means the
+            video has no value.
+        _keys: An array of values, in ascending order.
+        _docs: An array of video numbers, aligned with _keys.
+        _pending: A list of (old value, new value, video number) tuples not
+            yet applied to _keys and _docs. -1 means no value.
+    """
+    _MISSING = -1
+    # Changes are applied in place while there are fewer than
+    # len(_keys) // _IN_PLACE_RATIO of them. Each in-place change moves part
+    # of the arrays in C, which is far cheaper per entry than a merge in Python.
+    _IN_PLACE_RATIO = 256
+
+    def __init__(self):
+        self._values = array("q")
+        self._keys = array("q")
+        self._docs = array("I")
+        self._pending = []
+
+    def set(self, key, doc):
+        """Sets the value of a video, adding it to the index or updating it."""
+        missing = doc + 1 - len(self._values)
+        if missing > 0:
+            self._values.extend(array("q", [self._MISSING]) * missing)
+        old_key = self._values[doc]
+        if old_key == key:
+            return
+        self._values[doc] = key
+        self._pending.append((old_key, key, doc))
+
+    def remove(self, doc):
+        """Removes the value of a video, if it has one."""
+        if self.get(doc) is not None:
+            self.set(self._MISSING, doc)
+
+    def get(self, doc):
+        """Gets the value of a video, or None if it has no value."""
+        if doc >= len(self._values) or self._values[doc] == self._MISSING:
+            return None
+        return self._values[doc]
+
+    def contains(self, doc, low=None, high=None):
+        """Checks whether the value of a video lies in [low, high]. None means
+        the range is unbounded on that side. Videos without a value never do.
+        """
+        value = self.get(doc)
+        if value is None:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
+
+    def _position(self, key, doc):
+        """Gets the position of (key, doc) in the sorted arrays, or the position
+        it should be inserted at.
+        """
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, start)
+        return bisect_left(self._docs, doc, start, end)
+
+    def _apply_pending(self):
+        """Applies the buffered changes to the sorted arrays."""
+        if not self._pending:
+            return
+
+        if len(self._pending) < len(self._keys) // self._IN_PLACE_RATIO:
+            self._apply_pending_in_place()
+        else:
+            self._merge_pending()
+        self._pending = []
+
+    def _apply_pending_in_place(self):
+        """Removes old entries and inserts new ones in the sorted arrays, one
+        change at a time, in the order the changes were made.
+        """
+        keys = self._keys
+        docs = self._docs
+        for old_key, key, doc in self._pending:
+            if old_key != self._MISSING:
+                position = self._position(old_key, doc)
+                if position < len(keys) and keys[position] == old_key and docs[position] == doc:
+                    del keys[position]
+                    del docs[position]
+            if key != self._MISSING:
+                position = self._position(key, doc)
+                keys.insert(position, key)
+                docs.insert(position, doc)
+
+    def _merge_pending(self):
+        """Merges the buffered entries into the sorted arrays, dropping entries
+        for values that have since changed.
+        """
+        added = sorted((key, doc) for _, key, doc in self._pending if key != self._MISSING)
+        values = self._values
+        keys = array("q")
+        docs = array("I")
+        previous = None
+        # Both inputs are sorted, so this is a linear merge
+        for entry in heapq.merge(zip(self._keys, self._docs), added):
+            key, doc = entry
+            # A value changed back to an older one can be present twice
+            if entry == previous or values[doc] != key:
+                continue
+            previous = entry
+            keys.append(key)
+            docs.append(doc)
+        self._keys = keys
+        self._docs = docs
+
+    def _bounds(self, low, high):
+        self._apply_pending()
+        start = 0 if low is None else bisect_left(self._keys, low)
+        end = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return start, end
+
+    def count(self, low=None, high=None):
+        """Gets the number of videos whose value lies in [low, high], without
+        building the set of them.
+        """
+        start, end = self._bounds(low, high)
+        return max(end - start, 0)
+
+    def range(self, low=None, high=None):
+        """Gets the numbers of videos whose value lies in [low, high]. None
+        means the range is unbounded on that side.
+        """
+        start, end = self._bounds(low, high)
+        return set(self._docs[start:end])
+
+
+class VideoIndex:
+    """Holds indexes over Video objects so they can be queried by title
+    keywords, channel, length and view count without scanning every video.
+
+    Internally, each video is referred to by a number (its position in
+    _video_ids), so the indexes hold small integers instead of ID strings.
+
+    Attributes:
+        _video_ids: A list of video IDs, indexed by video number.
+        _docs: A dictionary of 'video_id: video number' entries.
+        _title_index: A dictionary of 'token: set of video numbers' entries.
+        _title_tokens: A list of sets of title tokens, indexed by video number.
+        _channel_index: A dictionary of 'lowercase channel name: set of video
+            numbers' entries.
+        _length_index: A _RangeIndex of video lengths, in seconds.
+        _views_index: A _RangeIndex of view counts.
+    """
+    def __init__(self):
+        """Initializes empty indexes."""
+        self._video_ids = []
+        self._docs = {}
+        self._title_index = {}
+        self._title_tokens = []
+        self._channel_index = {}
+        self._length_index = _RangeIndex()
+        self._views_index = _RangeIndex()
+
+    def __len__(self):
+        return len(self._video_ids)
+
+    def __contains__(self, video_id):
+        return video_id in self._docs
+
+    def add(self, video):
+        """Adds a Video object to every index. For videos already in the index,
+        only the view count is updated, since it changes between crawls. If
+        the new view count can't be parsed, the video's view count is cleared.
+
+        Args:
+            video: An instance of the Video dataclass.
+        """
+        video_id = video.video_id
+        doc = self._docs.get(video_id)
+        if doc is not None:
+            self._set_views(doc, video)
+            return
+
+        doc = len(self._video_ids)
+        self._video_ids.append(video_id)
+        self._docs[video_id] = doc
+
+        tokens = tokenize(video.title)
+        self._title_tokens.append(tokens)
+        for token in tokens:
+            self._title_index.setdefault(token, set()).add(doc)
+
+        self._channel_index.setdefault(video.channel.lower(), set()).add(doc)
+
+        length = parse_length(video.length)
+        if length is not None:
+            self._length_index.set(length, doc)
+
+        self._set_views(doc, video)
+
+    def _set_views(self, doc, video):
+        # A view count that can't be parsed (e.g. a video that is now a live
+        # stream) clears the old one, so view filters don't match stale counts
+        views = parse_view_count(video.view_count_text)
+        if views is None:
+            self._views_index.remove(doc)
+        else:
+            self._views_index.set(views, doc)
+
+    def query(
+        self,
+        title=None,
+        channel=None,
+        min_length=None,
+        max_length=None,
+        min_views=None,
+        max_views=None
+    ):
+        """Finds the videos matching every given criterion. Criteria left as
+        None are ignored.
+
+        The title and channel criteria are resolved first, by intersecting
+        their sets of videos starting from the smallest one. The length and
+        views ranges are then checked on the remaining candidates only. If
+        only ranges are given, the videos of the narrowest range are checked
+        against the other range.
+
+        Usage examples:
+            query(title="python tutorial")
+            query(channel="Corey Schafer", min_views=100000)
+            query(title="python", max_length=600)
+
+        Args:
+            title: A string of keywords which must all appear in the title
+                (case-insensitive). A string without any words matches no
+                videos.
+            channel: Name of the channel that uploaded the video
+                (case-insensitive).
+            min_length: Minimum length of the video, in seconds.
+            max_length: Maximum length of the video, in seconds.
+            min_views: Minimum number of views.
+            max_views: Maximum number of views.
+
+        Returns:
+            A set of IDs of the matching videos. If no criteria are given, all
+                indexed video IDs are returned.
+        """
+        candidate_sets = []
+        range_criteria = []
+
+        if title is not None:
+            title_tokens = tokenize(title)
+            if not title_tokens:
+                # A title filter without any words can't match any title
+                return set()
+            for token in title_tokens:
+                candidate_sets.append(self._title_index.get(token, set()))
+        if channel is not None:
+            candidate_sets.append(self._channel_index.get(channel.lower(), set()))
+        if min_length is not None or max_length is not None:
+            range_criteria.append((self._length_index, min_length, max_length))
+        if min_views is not None or max_views is not None:
+            range_criteria.append((self._views_index, min_views, max_views))
+
+        if candidate_sets:
+            # Intersect starting from the smallest set to keep intermediate sets small
+            candidate_sets.sort(key=len)
+            docs = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+        elif range_criteria:
+            range_criteria.sort(key=lambda criterion: criterion[0].count(criterion[1], criterion[2]))
+            range_index, low, high = range_criteria.pop(0)
+            docs = range_index.range(low, high)
+        else:
+            return set(self._video_ids)
+
+        return {
+            self._video_ids[doc] for doc in docs
+            if all(range_index.contains(doc, low, high) for range_index, low, high in range_criteria)
+        }
+
+    def find_near_duplicates(self, video_id, min_similarity=0.8, length_tolerance=5):
+        """Finds videos that are likely re-uploads of the given video, i.e. whose
+        title tokens are mostly the same and whose length is about the same.
+
+        Only videos sharing at least one title token are considered, using the
+        title inverted index.
+
+        Args:
+            video_id: The ID of an indexed video. For example, "dQw4w9WgXcQ".
+            min_similarity: Minimum Jaccard similarity (0.0 to 1.0) between
+                the title tokens of both videos.
+            length_tolerance: Maximum difference in length, in seconds. Only
+                checked if both videos have a known length.
+
+        Returns:
+            A list of (video_id, similarity) tuples, sorted by similarity in
+                descending order. Empty if the video is not indexed.
+        """
+        doc = self._docs.get(video_id)
+        if doc is None or not self._title_tokens[doc]:
+            return []
+        tokens = self._title_tokens[doc]
+
+        shared_counts = Counter()
+        for token in tokens:
+            shared_counts.update(self._title_index[token])
+        del shared_counts[doc]
+
+        length = self._length_index.get(doc)
+        duplicates = []
+        for other_doc, shared in shared_counts.items():
+            similarity = shared / (len(tokens) + len(self._title_tokens[other_doc]) - shared)
+            if similarity < min_similarity:
+                continue
+            other_length = self._length_index.get(other_doc)
+            if length is not None and other_length is not None \
+                    and abs(length - other_length) > length_tolerance:
+                continue
+            duplicates.append((self._video_ids[other_doc], similarity))
+
+        duplicates.sort(key=lambda entry: entry[1], reverse=True)
+        return duplicates
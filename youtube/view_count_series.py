@@ -0,0 +1,318 @@
+"""Provides the ViewCountSeries class."""
+
+
+__author__ = "Phixyn"
+
+
+import heapq
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from youtube.text_parsing import parse_view_count
+
+
+class ViewCountSeries:
+    """Append-only time series of view counts, recorded across repeated crawls.
+
+    Samples are stored column-wise in typed arrays rather than as one Python
+    object per sample, so each sample costs 20 bytes on disk. In memory, the
+    per-video row and timestamp arrays used for range queries add 12 bytes,
+    for 32 bytes per sample, plus two array objects per video.
+
+    When a base path is given, each column is backed by its own append-only
+    file (raw machine values, native byte order), and the video IDs are kept
+    in a newline-delimited file:
+
+        <path>.ids    - one video ID per line; line N is video index N
+        <path>.vid    - array('I') of video indices, one per sample
+        <path>.ts     - array('q') of UNIX timestamps (seconds), one per sample
+        <path>.views  - array('Q') of view counts, one per sample
+
+    New samples are buffered and only appended to the files on flush() (or
+    close(), or when leaving a 'with' block).
+
+    Attributes:
+        _path: Base path of the backing files, or None for an in-memory series.
+        _ids: A list of video IDs, indexed by video index.
+        _id_to_index: A dictionary of 'video_id: video index' entries.
+        _vid: Column of video indices.
+        _ts: Column of timestamps.
+        _views: Column of view counts.
+        _rows_by_video: A list (indexed by video index) of array('I') holding
+            the sample rows of each video, in timestamp order.
+        _ts_by_video: A list (indexed by video index) of array('q') holding
+            the timestamps of each video's samples, used for range queries.
+        _flushed_ids: Number of video IDs already written to disk.
+        _flushed_rows: Number of samples already written to disk.
+    """
+    _COLUMN_TYPECODES = (("vid", "I"), ("ts", "q"), ("views", "Q"))
+
+    def __init__(self, path=None):
+        """Initializes an empty series, then loads any samples previously
+        written to the files at the given base path.
+
+        Args:
+            path: Base path of the backing files (see class docstring). If
+                None, the series is only kept in memory.
+        """
+        self._path = path
+        self._ids = []
+        self._id_to_index = {}
+        self._vid = array("I")
+        self._ts = array("q")
+        self._views = array("Q")
+        self._rows_by_video = []
+        self._ts_by_video = []
+        self._flushed_ids = 0
+        self._flushed_rows = 0
+
+        if self._path is not None:
+            self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._vid)
+
+    def _column_path(self, name):
+        return f"{self._path}.{name}"
+
+    def _get_or_add_index(self, video_id):
+        index = self._id_to_index.get(video_id)
+        if index is None:
+            index = len(self._ids)
+            self._ids.append(video_id)
+            self._id_to_index[video_id] = index
+            self._rows_by_video.append(array("I"))
+            self._ts_by_video.append(array("q"))
+        return index
+
+    def _load(self):
+        """Reads the backing files, if they exist, into the in-memory columns.
+
+        A crawl interrupted mid-flush can leave a partly written last line in
+        the IDs file, a partly written last value in a column file, or column
+        files with different lengths. Only the complete video IDs and the
+        samples present in every column (and referring to a known video ID)
+        are kept, and the files are truncated back to that data. If the IDs
+        file is missing, no sample can be attributed to a video, so the column
+        files are truncated to zero length.
+        """
+        ids_path = self._column_path("ids")
+        if os.path.exists(ids_path):
+            with open(ids_path, "rb") as ids_file:
+                ids_data = ids_file.read()
+            complete_length = ids_data.rfind(b"\n") + 1
+            if complete_length < len(ids_data):
+                with open(ids_path, "r+b") as ids_file:
+                    ids_file.truncate(complete_length)
+            for line in ids_data[:complete_length].decode("utf-8").splitlines():
+                self._get_or_add_index(line)
+        self._flushed_ids = len(self._ids)
+
+        columns = []
+        file_sizes = []
+        for name, typecode in self._COLUMN_TYPECODES:
+            column = array(typecode)
+            column_path = self._column_path(name)
+            file_size = 0
+            if os.path.exists(column_path):
+                with open(column_path, "rb") as column_file:
+                    data = column_file.read()
+                file_size = len(data)
+                column.frombytes(data[:file_size - file_size % column.itemsize])
+            columns.append(column)
+            file_sizes.append(file_size)
+
+        row_count = min(len(column) for column in columns)
+        id_count = len(self._ids)
+        for row, index in enumerate(columns[0][:row_count]):
+            if index >= id_count:
+                row_count = row
+                break
+
+        for (name, _), column, file_size in zip(self._COLUMN_TYPECODES, columns, file_sizes):
+            del column[row_count:]
+            if file_size != row_count * column.itemsize:
+                with open(self._column_path(name), "r+b") as column_file:
+                    column_file.truncate(row_count * column.itemsize)
+        self._vid, self._ts, self._views = columns
+        self._flushed_rows = row_count
+
+        for row, (index, timestamp) in enumerate(zip(self._vid, self._ts)):
+            self._insert_into_video_rows(index, row, timestamp)
+
+    def _insert_into_video_rows(self, index, row, timestamp):
+        rows = self._rows_by_video[index]
+        timestamps = self._ts_by_video[index]
+        if not timestamps or timestamps[-1] <= timestamp:
+            rows.append(row)
+            timestamps.append(timestamp)
+        else:
+            position = bisect_right(timestamps, timestamp)
+            rows.insert(position, row)
+            timestamps.insert(position, timestamp)
+
+    def add_sample(self, video_id, views, timestamp=None):
+        """Appends a (video_id, timestamp, views) sample to the series.
+
+        Args:
+            video_id: A unique string ID for the video.
+            views: The number of views for the video, as an integer.
+            timestamp: UNIX timestamp (seconds) of the sample. Defaults to
+                the current time.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        timestamp = int(timestamp)
+
+        index = self._get_or_add_index(video_id)
+        row = len(self._vid)
+        self._vid.append(index)
+        self._ts.append(timestamp)
+        self._views.append(views)
+        self._insert_into_video_rows(index, row, timestamp)
+
+    def add_video_sample(self, video, timestamp=None):
+        """Appends a sample for the given Video object, using its parsed
+        view_count_text. Videos whose view count can't be parsed are skipped.
+
+        Args:
+            video: An instance of the Video dataclass.
+            timestamp: UNIX timestamp (seconds) of the sample. Defaults to
+                the current time.
+
+        Returns:
+            True if a sample was added, False otherwise.
+        """
+        views = parse_view_count(video.view_count_text)
+        if views is None:
+            print(f"Could not parse view count '{video.view_count_text}' for video '{video.video_id}'.")
+            return False
+        self.add_sample(video.video_id, views, timestamp)
+        return True
+
+    def get_samples(self, video_id, start=None, end=None):
+        """Gets the samples recorded for a video, optionally restricted to a
+        time range.
+
+        Args:
+            video_id: The ID of a video. For example, "dQw4w9WgXcQ".
+            start: Inclusive lower bound UNIX timestamp, or None for no bound.
+            end: Inclusive upper bound UNIX timestamp, or None for no bound.
+
+        Returns:
+            A list of (timestamp, views) tuples in timestamp order. Empty if
+                the video has no samples in the range.
+        """
+        index = self._id_to_index.get(video_id)
+        if index is None:
+            return []
+
+        timestamps = self._ts_by_video[index]
+        low = 0 if start is None else bisect_left(timestamps, start)
+        high = len(timestamps) if end is None else bisect_right(timestamps, end)
+        rows = self._rows_by_video[index]
+        return [(self._ts[row], self._views[row]) for row in rows[low:high]]
+
+    def get_latest_views(self, video_id):
+        """Gets the most recently sampled view count for a video.
+
+        Args:
+            video_id: The ID of a video.
+
+        Returns:
+            The latest view count, or None if the video has no samples.
+        """
+        index = self._id_to_index.get(video_id)
+        if index is None or not self._rows_by_video[index]:
+            return None
+        return self._views[self._rows_by_video[index][-1]]
+
+    def get_video_ids(self):
+        """Gets the IDs of every video with at least one sample.
+
+        Returns:
+            A list of video ID strings.
+        """
+        return list(self._ids)
+
+    def get_fastest_growing(self, count=10, start=None, end=None):
+        """Finds the videos whose view count grew fastest over a time range.
+
+        Performs a single pass over the whole timestamp, video and views
+        columns, keeping the first and last sample of each video in
+        per-video arrays. Videos need at least two samples at different
+        timestamps within the range to be ranked.
+
+        Args:
+            count: Maximum number of videos to return.
+            start: Inclusive lower bound UNIX timestamp, or None for no bound.
+            end: Inclusive upper bound UNIX timestamp, or None for no bound.
+
+        Returns:
+            A list of (video_id, views_gained, views_per_hour) tuples, sorted
+                by views_per_hour in descending order.
+        """
+        video_count = len(self._ids)
+        first_ts = array("q", [0]) * video_count
+        first_views = array("Q", [0]) * video_count
+        last_ts = array("q", [0]) * video_count
+        last_views = array("Q", [0]) * video_count
+        seen = bytearray(video_count)
+
+        for index, timestamp, views in zip(self._vid, self._ts, self._views):
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp > end:
+                continue
+            if not seen[index]:
+                seen[index] = 1
+                first_ts[index] = last_ts[index] = timestamp
+                first_views[index] = last_views[index] = views
+            elif timestamp < first_ts[index]:
+                first_ts[index] = timestamp
+                first_views[index] = views
+            elif timestamp >= last_ts[index]:
+                last_ts[index] = timestamp
+                last_views[index] = views
+
+        growth = []
+        for index in range(video_count):
+            elapsed = last_ts[index] - first_ts[index]
+            if not seen[index] or elapsed <= 0:
+                continue
+            gained = last_views[index] - first_views[index]
+            growth.append((self._ids[index], gained, gained * 3600 / elapsed))
+
+        return heapq.nlargest(count, growth, key=lambda entry: entry[2])
+
+    def flush(self):
+        """Appends any samples and video IDs added since the last flush to the
+        backing files. Does nothing for an in-memory series.
+        """
+        if self._path is None:
+            return
+
+        if len(self._ids) > self._flushed_ids:
+            with open(self._column_path("ids"), "a", encoding="utf-8") as ids_file:
+                for video_id in self._ids[self._flushed_ids:]:
+                    ids_file.write(f"{video_id}\n")
+            self._flushed_ids = len(self._ids)
+
+        if len(self._vid) > self._flushed_rows:
+            columns = (self._vid, self._ts, self._views)
+            for (name, _), column in zip(self._COLUMN_TYPECODES, columns):
+                with open(self._column_path(name), "ab") as column_file:
+                    column[self._flushed_rows:].tofile(column_file)
+            self._flushed_rows = len(self._vid)
+
+    def close(self):
+        """Flushes any pending samples to the backing files."""
+        self.flush()